@@ -1,18 +1,35 @@
 """Agent configuration registry."""
 
-from agents import AgentConfig, AnthropicAgentConfig, OpenAIAgentConfig
+import importlib
+from functools import lru_cache
 
-# List of all available agent configurations
+from agents import AgentConfig
+
+# List of all available agent configurations as (display name, "module:attribute") pairs.
+# Agents are imported lazily on selection so provider SDKs don't slow down cold start.
 # Add new agents here to make them available in the UI
-AVAILABLE_AGENTS = [
-    AnthropicAgentConfig,
-    OpenAIAgentConfig,
+AVAILABLE_AGENTS: list[tuple[str, str]] = [
+    ("Anthropic Agent", "agents.anthropic_agent:AnthropicAgentConfig"),
+    ("OpenAI Agent", "agents.openai_agent:OpenAIAgentConfig"),
 ]
 
 
+@lru_cache(maxsize=None)
+def _materialise(path: str) -> type[AgentConfig]:
+    """Import and return the agent config class referenced by a "module:attribute" path."""
+    module_name, attr = path.split(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
 def get_agent_by_name(name: str) -> type[AgentConfig] | None:
     """Get agent config class by display name."""
-    for agent in AVAILABLE_AGENTS:
-        if agent.get_name() == name:
+    for agent_name, path in AVAILABLE_AGENTS:
+        if agent_name == name:
+            agent = _materialise(path)
+            # Keep the registry in sync with the class's own display name
+            if agent.get_name() != agent_name:
+                raise ValueError(
+                    f"AVAILABLE_AGENTS lists {path} as {agent_name!r}, but its get_name() is {agent.get_name()!r}"
+                )
             return agent
     return None
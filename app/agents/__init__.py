@@ -1,7 +1,26 @@
 """Agent configurations for the Streamlit chat application."""
 
-from .anthropic_agent import AnthropicAgentConfig
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .base import AgentConfig
-from .openai_agent import OpenAIAgentConfig
+
+if TYPE_CHECKING:
+    from .anthropic_agent import AnthropicAgentConfig
+    from .openai_agent import OpenAIAgentConfig
 
 __all__ = ["AgentConfig", "AnthropicAgentConfig", "OpenAIAgentConfig"]
+
+# Provider-specific configs are imported on first access (PEP 562) to keep
+# heavy SDK imports out of application startup.
+_LAZY_EXPORTS = {
+    "AnthropicAgentConfig": ".anthropic_agent",
+    "OpenAIAgentConfig": ".openai_agent",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,33 @@
 """Anthropic agent configuration with DuckDuckGo search capability."""
 
+from functools import lru_cache
 from typing import Any
 
 import streamlit as st
 from langchain.agents import create_agent
 from langchain_anthropic import ChatAnthropic
-from langchain_community.tools import DuckDuckGoSearchRun
 from langgraph.checkpoint.sqlite import SqliteSaver
 
 from .base import AgentConfig
+from .tools import get_search_tool
+
+
+@lru_cache(maxsize=8)
+def _anthropic_llm(model: str, temperature: float, max_tokens: int, thinking_budget: int | None) -> ChatAnthropic:
+    """Return a ChatAnthropic client, reused across rebuilds with the same settings."""
+    llm_params: dict[str, Any] = {
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+    if thinking_budget is not None:
+        llm_params["thinking"] = {
+            "type": "enabled",
+            "budget_tokens": thinking_budget
+        }
+
+    return ChatAnthropic(**llm_params)
 
 
 class AnthropicAgentConfig(AgentConfig):
@@ -21,78 +40,82 @@ class AnthropicAgentConfig(AgentConfig):
     @staticmethod
     def render_options() -> dict[str, Any]:
         """Render UI for Anthropic agent options."""
+        # Last applied options seed the widgets: Streamlit drops a widget's state
+        # while it isn't rendered (e.g. while another agent is selected)
+        applied = st.session_state.get("anthropic_options", {})
         options = {}
 
+        models = [
+            "claude-sonnet-4-20250514",
+            "claude-3-7-sonnet-20250219",
+            "claude-3-5-sonnet-20241022",
+            "claude-3-5-haiku-20241022",
+        ]
+
+        # Model and thinking toggle stay outside the form and apply immediately,
+        # since they decide which of the other options are shown
         options["model"] = st.selectbox(
             "Model",
-            [
-                "claude-sonnet-4-20250514",
-                "claude-3-7-sonnet-20250219",
-                "claude-3-5-sonnet-20241022",
-                "claude-3-5-haiku-20241022",
-            ],
-            index=0,
+            models,
+            index=models.index(applied["model"]) if applied.get("model") in models else 0,
             key="anthropic_model",
             help="Select the Anthropic model to use"
         )
 
-        options["temperature"] = st.slider(
-            "Temperature",
-            min_value=0.0,
-            max_value=1.0,
-            value=1.0,
-            step=0.1,
-            key="anthropic_temp",
-            help="Controls randomness in responses"
-        )
-
-        options["max_tokens"] = st.number_input(
-            "Max Tokens",
-            min_value=1024,
-            max_value=8192,
-            value=5000,
-            step=512,
-            key="anthropic_max_tokens",
-            help="Maximum tokens in response"
-        )
-
         options["thinking_enabled"] = st.checkbox(
             "Enable Extended Thinking",
-            value=False,
+            value=applied.get("thinking_enabled", False),
             key="anthropic_thinking",
             help="Enable extended thinking for complex reasoning"
         )
 
-        if options["thinking_enabled"]:
-            options["thinking_budget"] = st.number_input(
-                "Thinking Budget (tokens)",
-                min_value=500,
-                max_value=10000,
-                value=2000,
-                step=500,
-                key="anthropic_thinking_budget",
-                help="Token budget for thinking phase"
+        # Batch the remaining widgets in a form so adjusting them doesn't rerun the app until applied.
+        # Form widgets keep returning their last submitted values until Apply is clicked.
+        with st.form("anthropic_options_form", border=False):
+            options["temperature"] = st.slider(
+                "Temperature",
+                min_value=0.0,
+                max_value=1.0,
+                value=applied.get("temperature", 1.0),
+                step=0.1,
+                key="anthropic_temp",
+                help="Controls randomness in responses"
             )
 
+            options["max_tokens"] = st.number_input(
+                "Max Tokens",
+                min_value=1024,
+                max_value=8192,
+                value=applied.get("max_tokens", 5000),
+                step=512,
+                key="anthropic_max_tokens",
+                help="Maximum tokens in response"
+            )
+
+            if options["thinking_enabled"]:
+                options["thinking_budget"] = st.number_input(
+                    "Thinking Budget (tokens)",
+                    min_value=500,
+                    max_value=10000,
+                    value=applied.get("thinking_budget", 2000),
+                    step=500,
+                    key="anthropic_thinking_budget",
+                    help="Token budget for thinking phase"
+                )
+
+            st.form_submit_button("Apply")
+
+        st.session_state.anthropic_options = options
         return options
 
     @staticmethod
     def build(checkpoint: SqliteSaver, options: dict[str, Any]) -> Any:
         """Build Anthropic agent with DuckDuckGo search tool."""
-        llm_params = {
-            "model": options["model"],
-            "temperature": options["temperature"],
-            "max_tokens": options["max_tokens"],
-        }
-
-        if options.get("thinking_enabled"):
-            llm_params["thinking"] = {
-                "type": "enabled",
-                "budget_tokens": options.get("thinking_budget", 2000)
-            }
+        thinking_budget = options.get("thinking_budget", 2000) if options.get("thinking_enabled") else None
+        llm = _anthropic_llm(options["model"], options["temperature"], options["max_tokens"], thinking_budget)
 
         return create_agent(
-            ChatAnthropic(**llm_params),
-            [DuckDuckGoSearchRun()],
+            llm,
+            [get_search_tool()],
             checkpointer=checkpoint
         )
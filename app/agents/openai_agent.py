@@ -1,14 +1,30 @@
 """OpenAI agent configuration with DuckDuckGo search capability."""
 
+from functools import lru_cache
 from typing import Any
 
 import streamlit as st
 from langchain.agents import create_agent
-from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.sqlite import SqliteSaver
 
 from .base import AgentConfig
+from .tools import get_search_tool
+
+
+@lru_cache(maxsize=8)
+def _openai_llm(model: str, max_tokens: int, temperature: float | None) -> ChatOpenAI:
+    """Return a ChatOpenAI client, reused across rebuilds with the same settings."""
+    llm_params: dict[str, Any] = {
+        "model": model,
+        "max_tokens": max_tokens,
+    }
+
+    # Only add temperature for non-thinking models
+    if temperature is not None:
+        llm_params["temperature"] = temperature
+
+    return ChatOpenAI(**llm_params)
 
 
 class OpenAIAgentConfig(AgentConfig):
@@ -21,20 +37,27 @@ class OpenAIAgentConfig(AgentConfig):
     @staticmethod
     def render_options() -> dict[str, Any]:
         """Render UI for OpenAI agent options."""
+        # Last applied options seed the widgets: Streamlit drops a widget's state
+        # while it isn't rendered (e.g. while another agent is selected)
+        applied = st.session_state.get("openai_options", {})
         options = {}
 
+        models = [
+            "gpt-5",
+            "gpt-4o",
+            "gpt-4o-mini",
+            "gpt-4-turbo",
+            "gpt-4",
+            "o1",
+            "o3-mini",
+        ]
+
+        # Model stays outside the form and applies immediately,
+        # since it decides whether temperature is shown
         options["model"] = st.selectbox(
             "Model",
-            [
-                "gpt-5",
-                "gpt-4o",
-                "gpt-4o-mini",
-                "gpt-4-turbo",
-                "gpt-4",
-                "o1",
-                "o3-mini",
-            ],
-            index=0,
+            models,
+            index=models.index(applied["model"]) if applied.get("model") in models else 0,
             key="openai_model",
             help="Select the OpenAI model to use"
         )
@@ -42,43 +65,42 @@ class OpenAIAgentConfig(AgentConfig):
         # o1/o3 models don't support temperature parameter
         is_thinking_model = options["model"] in ["o1", "o3-mini"]
 
-        if not is_thinking_model:
-            options["temperature"] = st.slider(
-                "Temperature",
-                min_value=0.0,
-                max_value=2.0,
-                value=0.7,
-                step=0.1,
-                key="openai_temp",
-                help="Controls randomness in responses"
+        # Batch the remaining widgets in a form so adjusting them doesn't rerun the app until applied.
+        # Form widgets keep returning their last submitted values until Apply is clicked.
+        with st.form("openai_options_form", border=False):
+            if not is_thinking_model:
+                options["temperature"] = st.slider(
+                    "Temperature",
+                    min_value=0.0,
+                    max_value=2.0,
+                    value=applied.get("temperature", 0.7),
+                    step=0.1,
+                    key="openai_temp",
+                    help="Controls randomness in responses"
+                )
+
+            options["max_tokens"] = st.number_input(
+                "Max Tokens",
+                min_value=512,
+                max_value=16384,
+                value=applied.get("max_tokens", 4096),
+                step=512,
+                key="openai_max_tokens",
+                help="Maximum tokens in response"
             )
 
-        options["max_tokens"] = st.number_input(
-            "Max Tokens",
-            min_value=512,
-            max_value=16384,
-            value=4096,
-            step=512,
-            key="openai_max_tokens",
-            help="Maximum tokens in response"
-        )
+            st.form_submit_button("Apply")
 
+        st.session_state.openai_options = options
         return options
 
     @staticmethod
     def build(checkpoint: SqliteSaver, options: dict[str, Any]) -> Any:
         """Build OpenAI agent with DuckDuckGo search tool."""
-        llm_params = {
-            "model": options["model"],
-            "max_tokens": options["max_tokens"],
-        }
-
-        # Only add temperature for non-thinking models
-        if "temperature" in options:
-            llm_params["temperature"] = options["temperature"]
+        llm = _openai_llm(options["model"], options["max_tokens"], options.get("temperature"))
 
         return create_agent(
-            ChatOpenAI(**llm_params),
-            [DuckDuckGoSearchRun()],
+            llm,
+            [get_search_tool()],
             checkpointer=checkpoint
         )
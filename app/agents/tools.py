@@ -0,0 +1,11 @@
+"""Shared tool instances for agent configurations."""
+
+from functools import lru_cache
+
+from langchain_community.tools import DuckDuckGoSearchRun
+
+
+@lru_cache(maxsize=1)
+def get_search_tool() -> DuckDuckGoSearchRun:
+    """Return a DuckDuckGo search tool shared by all agents."""
+    return DuckDuckGoSearchRun()
@@ -1,13 +1,17 @@
+import time
 import uuid
+from typing import Any
 
 import streamlit as st
 from agent_config import AVAILABLE_AGENTS, get_agent_by_name
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
 from utils import (
     convert_input_to_content,
     display_chat_history,
     extract_text_chunks,
+    get_thread_rowids,
     get_thread_title,
     get_threads,
     initialize_checkpoint,
@@ -18,6 +22,22 @@ from utils import (
 
 load_dotenv()
 
+# Minimum seconds between markdown updates while streaming (~20 Hz)
+STREAM_FLUSH_INTERVAL = 0.05
+
+
+@st.cache_resource(max_entries=8, show_spinner="Initializing agent...")
+def _build_agent(name: str, opts_key: tuple[tuple[str, Any], ...], _checkpoint: SqliteSaver) -> Any:
+    """Build an agent once per (name, options) pair and reuse it across reruns and sessions.
+
+    ``_checkpoint`` is excluded from the cache key; this is safe because all
+    sessions share the single saver from ``initialize_checkpoint``.
+    """
+    agent_config = get_agent_by_name(name)
+    if agent_config is None:
+        raise ValueError(f"Unknown agent: {name}")
+    return agent_config.build(_checkpoint, dict(opts_key))
+
 
 def main():
     """Main Streamlit application for LangGraph Agent Chat."""
@@ -30,6 +50,7 @@ def main():
 
         # Thread management: Get existing threads and determine current thread
         threads, latest = get_threads(st.session_state.checkpoint)
+        rowids = get_thread_rowids(st.session_state.checkpoint)
         current = st.session_state.get('thread_id') or latest or str(uuid.uuid4())
         st.session_state.thread_id = current
 
@@ -43,7 +64,7 @@ def main():
             threads,
             key="select_thread",
             index=(threads.index(current) if current in threads else 0),
-            format_func=get_thread_title,
+            format_func=lambda tid: get_thread_title(tid, rowids.get(tid)),
             on_change=lambda: setattr(st.session_state, 'thread_id', st.session_state.select_thread),
         )
         st.button("New chat", on_click=lambda: setattr(st.session_state, 'thread_id', str(uuid.uuid4())))
@@ -61,7 +82,7 @@ def main():
         st.header("⚙️ Agent Settings")
 
         # Agent selection: Display available agents
-        agent_names = [agent.get_name() for agent in AVAILABLE_AGENTS]
+        agent_names = [name for name, _ in AVAILABLE_AGENTS]
         if not agent_names:
             st.warning("No agents configured. Please add agents to AVAILABLE_AGENTS.")
             st.stop()
@@ -82,19 +103,15 @@ def main():
         st.subheader("Agent Options")
         options = selected_agent_config.render_options()
 
-        # Rebuild agent if configuration changed
-        prev_name = st.session_state.get("current_agent_name")
-        needs_rebuild = (
-            prev_name != selected_name or
-            st.session_state.get("agent_options") != options or
-            "agent" not in st.session_state
-        )
+        # Rebuild agent only if configuration changed (builds are also cached across sessions).
+        # Sorting makes the key independent of option insertion order.
+        opts_key = tuple(sorted(options.items()))
+        agent_key = (selected_name, opts_key)
+        needs_rebuild = st.session_state.get("agent_key") != agent_key or "agent" not in st.session_state
 
         if needs_rebuild:
-            with st.spinner(f"Initializing {selected_name}..."):
-                st.session_state.agent = selected_agent_config.build(st.session_state.checkpoint, options)
-                st.session_state.current_agent_name = selected_name
-                st.session_state.agent_options = options
+            st.session_state.agent = _build_agent(selected_name, opts_key, st.session_state.checkpoint)
+            st.session_state.agent_key = agent_key
 
     # === Main Area: Chat Interface ===
     # Chat input with multimodal support (text + images)
@@ -134,13 +151,27 @@ def main():
                 thinking_container = st.container()
                 tools_container = st.container()
                 text_container = st.container()
-                text_buffer = []
+                text_buffer = ""
+
+                # Thinking/tool messages share one expander per title, updated in place,
+                # so events stay live without adding a new expander per event
+                tool_placeholders: dict[str, Any] = {}
+                tool_payloads: dict[str, list[Any]] = {}
+
+                def collect_tool_event(title: str, payload: Any) -> None:
+                    """Route a thinking/tool message to its title's expander in the appropriate container."""
+                    # Show text held back by the throttle before the (possibly long) tool pause
+                    text_element.markdown(text_buffer)
+
+                    if title not in tool_placeholders:
+                        target = thinking_container if "Thinking" in title else tools_container
+                        with target:
+                            tool_placeholders[title] = st.empty()
+                        tool_payloads[title] = []
 
-                def render_to_container(title, payload):
-                    """Route thinking/tool messages to appropriate containers."""
-                    target = thinking_container if "Thinking" in title else tools_container
-                    with target:
-                        render_tool(title, payload)
+                    tool_payloads[title].append(payload)
+                    with tool_placeholders[title].container():
+                        render_tool(title, *tool_payloads[title])
 
                 with text_container:
                     text_element = st.empty()
@@ -152,10 +183,19 @@ def main():
                     stream_mode="messages",
                 )
 
-                # Process stream and display text chunks incrementally
-                for text_chunk in extract_text_chunks(stream, tool_callback=render_to_container):
-                    text_buffer.append(text_chunk)
-                    text_element.markdown("".join(text_buffer))
+                # Process stream and display text chunks incrementally,
+                # throttling UI updates to avoid resending the whole message per token
+                last_flush = time.monotonic()
+                for text_chunk in extract_text_chunks(stream, tool_callback=collect_tool_event):
+                    # In-place append: CPython resizes the string when it holds the only reference
+                    text_buffer += text_chunk
+                    now = time.monotonic()
+                    if now - last_flush > STREAM_FLUSH_INTERVAL:
+                        text_element.markdown(text_buffer)
+                        last_flush = now
+
+                # Final flush so the tail of the response is always shown
+                text_element.markdown(text_buffer)
             else:
                 # Non-streaming mode: Invoke agent and wait for complete response
                 with st.spinner("Processing..."):
@@ -5,15 +5,69 @@ import sqlite3
 from typing import Any, Callable, Iterator
 
 import streamlit as st
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langgraph.checkpoint.sqlite import SqliteSaver
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 
-TOOL_TYPES = {"tool", "tool_message", "function"}
+TOOL_TYPES = frozenset({"tool", "tool_message", "function"})
 
+# Number of most recent messages rendered in the chat history by default
+HISTORY_WINDOW = 30
 
-def render_tool(title: str, payload: Any) -> None:
-    """Display a tool call result in an expandable container."""
+
+def render_tool(title: str, *payloads: Any) -> None:
+    """Display tool call results in an expandable container."""
     with st.expander(title or "Tool", expanded=False):
-        st.write(payload)
+        for payload in payloads:
+            st.write(payload)
+
+
+def _discard_tool_event(title: str, payload: Any) -> None:
+    """Default tool callback that ignores tool/thinking messages."""
+
+
+def _flush_thinking(thinking_buffer: list[str], emit: Callable[[str, Any], None]) -> None:
+    """Send buffered thinking content via callback and clear buffer."""
+    if thinking_buffer:
+        emit("💭 Thinking", "".join(thinking_buffer))
+        thinking_buffer.clear()
+
+
+# Content part handlers: each returns text to yield, or None
+def _handle_thinking_part(
+    part: dict[str, Any], part_type: str, thinking_buffer: list[str], emit: Callable[[str, Any], None]
+) -> str | None:
+    """Accumulate thinking content in buffer."""
+    thinking_buffer.append(part.get("thinking", ""))
+    return None
+
+
+def _handle_text_part(
+    part: dict[str, Any], part_type: str, thinking_buffer: list[str], emit: Callable[[str, Any], None]
+) -> str | None:
+    """Flush thinking before displaying text."""
+    _flush_thinking(thinking_buffer, emit)
+    return part.get("text") or None
+
+
+def _handle_other_part(
+    part: dict[str, Any], part_type: str, thinking_buffer: list[str], emit: Callable[[str, Any], None]
+) -> str | None:
+    """Send other types (tool_use, server_tool_use, web_search_tool_result, etc.) via callback."""
+    # Skip delta types (streaming intermediate states)
+    if "delta" in part_type:
+        return None
+
+    _flush_thinking(thinking_buffer, emit)
+    title = part.get("name", part_type) if "name" in part else part_type
+    emit(f"🔧 {title}", part)
+    return None
+
+
+_PART_HANDLERS = {
+    "thinking": _handle_thinking_part,
+    "text": _handle_text_part,
+}
 
 
 def extract_text_chunks(
@@ -34,32 +88,28 @@ def extract_text_chunks(
     Yields:
         Text chunks to be displayed to the user
     """
+    # Resolve the callback once so the per-chunk loop doesn't branch on it
+    emit = tool_callback or _discard_tool_event
+
     # Buffer for accumulating thinking content before displaying
     thinking_buffer: list[str] = []
 
-    def flush_thinking() -> None:
-        """Send buffered thinking content via callback and clear buffer."""
-        if thinking_buffer and tool_callback:
-            tool_callback("💭 Thinking", "".join(thinking_buffer))
-            thinking_buffer.clear()
-
     for event in message_stream:
         # Unwrap event tuple if needed
-        chunk = event[0] if isinstance(event, tuple) else event
+        chunk = event[0] if event.__class__ is tuple else event
         msg_type = getattr(chunk, "type", None)
 
         # Handle ToolMessage (tool execution results)
-        if isinstance(msg_type, str) and msg_type.lower() in TOOL_TYPES:
-            if tool_callback:
-                tool_name = getattr(chunk, "name", None) or getattr(chunk, "tool", None) or "Tool"
-                payload = getattr(chunk, "content", None) or (chunk if isinstance(chunk, dict) else None)
-                tool_callback(f"Tool: {tool_name}", payload)
+        if msg_type.__class__ is str and msg_type.lower() in TOOL_TYPES:
+            tool_name = getattr(chunk, "name", None) or getattr(chunk, "tool", None) or "Tool"
+            payload = getattr(chunk, "content", None) or (chunk if isinstance(chunk, dict) else None)
+            emit(f"Tool: {tool_name}", payload)
             continue
 
         content = getattr(chunk, "content", None)
 
         # Anthropic: content is a list of parts (multimodal/thinking/text)
-        if isinstance(content, list):
+        if content.__class__ is list:
             for part in content:
                 if not isinstance(part, dict):
                     continue
@@ -69,37 +119,35 @@ def extract_text_chunks(
                 if not part_type:
                     continue
 
-                if part_type == "thinking":
-                    # Accumulate thinking content in buffer
-                    thinking_buffer.append(part.get("thinking", ""))
-                elif part_type == "text":
-                    # Flush thinking before displaying text
-                    flush_thinking()
-                    if text := part.get("text"):
-                        yield text
-                elif "delta" in part_type:
-                    # Skip delta types (streaming intermediate states)
-                    continue
-                else:
-                    # Other types (tool_use, server_tool_use, web_search_tool_result, etc.)
-                    flush_thinking()
-                    if tool_callback:
-                        title = part.get("name", part_type) if "name" in part else part_type
-                        tool_callback(f"🔧 {title}", part)
+                handler = _PART_HANDLERS.get(part_type, _handle_other_part)
+                if text := handler(part, part_type, thinking_buffer, emit):
+                    yield text
 
         # OpenAI: content is a simple string
         elif isinstance(content, str):
-            flush_thinking()
+            _flush_thinking(thinking_buffer, emit)
             yield content
 
     # Flush any remaining thinking content at the end
-    flush_thinking()
+    _flush_thinking(thinking_buffer, emit)
 
 
 # Thread management functions
-def get_threads(checkpoint: SqliteSaver) -> tuple[list[str], str | None]:
-    """Return (threads_latest_first, latest_thread_id)."""
+def get_thread_rowids(checkpoint: SqliteSaver) -> dict[str, int]:
+    """Return {thread_id: latest checkpoint rowid}, ordered latest first.
+
+    Results are memoized in session state until the database changes, which is
+    detected via ``PRAGMA data_version`` (commits from other connections) and
+    ``total_changes`` (commits from this connection).
+    """
     with checkpoint.cursor() as cur:
+        cur.execute("PRAGMA data_version")
+        version = (cur.fetchone()[0], checkpoint.conn.total_changes)
+
+        cached = st.session_state.get("_threads_cache")
+        if cached and cached[0] == version:
+            return cached[1]
+
         cur.execute(
             """
             SELECT thread_id, MAX(rowid) AS mr
@@ -108,18 +156,31 @@ def get_threads(checkpoint: SqliteSaver) -> tuple[list[str], str | None]:
             ORDER BY mr DESC
             """
         )
-        rows = cur.fetchall()
+        rowids = dict(cur.fetchall())
+
+    st.session_state._threads_cache = (version, rowids)
+    return rowids
 
-    threads = [row[0] for row in rows]
+
+def get_threads(checkpoint: SqliteSaver) -> tuple[list[str], str | None]:
+    """Return (threads_latest_first, latest_thread_id)."""
+    threads = list(get_thread_rowids(checkpoint))
     return threads, threads[0] if threads else None
 
 
-def get_thread_title(thread_id: str) -> str:
+def get_thread_title(thread_id: str, rowid: int | None = None) -> str:
     """Get the title for a thread based on its first message.
 
-    Includes thread_id prefix to ensure uniqueness in the UI.
+    Includes thread_id prefix to ensure uniqueness in the UI. Pass the thread's
+    latest checkpoint rowid to reuse the cached title until the thread changes.
     """
-    tup = st.session_state.checkpoint.get_tuple({"configurable": {"thread_id": thread_id}})
+    return _thread_title(thread_id, rowid, st.session_state.checkpoint)
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _thread_title(thread_id: str, rowid: int | None, _checkpoint: SqliteSaver) -> str:
+    """Build the thread title; cached per (thread_id, rowid)."""
+    tup = _checkpoint.get_tuple({"configurable": {"thread_id": thread_id}})
     if not tup:
         return f"[{thread_id[:8]}] New thread"
 
@@ -166,29 +227,44 @@ def on_delete_thread(thread_id: str) -> None:
 
 
 # Message display functions
+def _render_text_part(part: dict[str, Any]) -> None:
+    """Display a text part."""
+    st.write(part.get("text", ""))
+
+
+def _render_image_part(part: dict[str, Any]) -> None:
+    """Display an image part from its URL or data URL."""
+    url_part = part.get("image_url")
+    url = url_part.get("url") if isinstance(url_part, dict) else url_part
+    if url:
+        st.image(url)
+
+
+def _render_skipped_part(part: dict[str, Any]) -> None:
+    """Skip parts rendered elsewhere (thinking blocks are handled in show_message)."""
+
+
+def _render_generic_part(part: dict[str, Any]) -> None:
+    """Display other types (server_tool_use, web_search_tool_result, etc.) in an expander."""
+    part_type = part.get("type")
+    title = part.get("name", part_type) if "name" in part else part_type
+    with st.expander(f"🔧 {title}", expanded=False):
+        st.write(part)
+
+
+_PART_RENDERERS: dict[Any, Callable[[dict[str, Any]], None]] = {
+    "text": _render_text_part,
+    "image_url": _render_image_part,
+    "thinking": _render_skipped_part,
+}
+
+
 def render_part(part: Any) -> None:
     """Display a single part of multimodal message content (text, image, tool use, etc.)."""
     if not isinstance(part, dict):
         return
 
-    part_type = part.get("type")
-
-    if part_type == "text":
-        st.write(part.get("text", ""))
-    elif part_type == "image_url":
-        url_part = part.get("image_url")
-        url = url_part.get("url") if isinstance(url_part, dict) else url_part
-        if url:
-            st.image(url)
-    elif part_type == "thinking":
-        # Thinking blocks are handled separately in show_message
-        pass
-    else:
-        # All other types (server_tool_use, web_search_tool_result, etc.)
-        # Display generically in expander
-        title = part.get("name", part_type) if "name" in part else part_type
-        with st.expander(f"🔧 {title}", expanded=False):
-            st.write(part)
+    _PART_RENDERERS.get(part.get("type"), _render_generic_part)(part)
 
 
 def render_content(content: str | list[Any]) -> None:
@@ -200,6 +276,14 @@ def render_content(content: str | list[Any]) -> None:
         st.write(content)
 
 
+def _to_data_url(file: UploadedFile) -> str:
+    """Build a base64 data URL for an uploaded file."""
+    mime_type = getattr(file, 'type', None) or 'image/png'
+    # Encode a zero-copy view of the upload; base64 output is pure ASCII
+    with file.getbuffer() as data:
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
 def convert_input_to_content(user_text: str, user_files: list[Any]) -> str | list[dict[str, Any]]:
     """Convert Streamlit chat input to LangChain message content format.
 
@@ -214,22 +298,20 @@ def convert_input_to_content(user_text: str, user_files: list[Any]) -> str | lis
     Returns:
         String for text-only, or list of content parts for multimodal input
     """
+    text = user_text.strip() if isinstance(user_text, str) else ""
+
     # Text-only input: return as simple string
     if not user_files:
-        return user_text.strip() if isinstance(user_text, str) else ""
+        return text
 
     # Multimodal input: build list of content parts
-    parts: list[dict[str, Any]] = []
-    if isinstance(user_text, str) and user_text.strip():
-        parts.append({"type": "text", "text": user_text.strip()})
+    parts: list[dict[str, Any]] = [{"type": "text", "text": text}] if text else []
 
     # Convert uploaded images to base64 data URLs
     for f in user_files:
-        mime_type = getattr(f, 'type', None) or 'image/png'
-        encoded = base64.b64encode(f.getvalue()).decode('utf-8')
         parts.append({
             "type": "image_url",
-            "image_url": {"url": f"data:{mime_type};base64,{encoded}"}
+            "image_url": {"url": _to_data_url(f)}
         })
 
     return parts
@@ -241,41 +323,80 @@ def get_speaker(msg: Any) -> str:
     return "user" if msg_type in {"user", "human"} else "assistant"
 
 
+def _show_chat_message(msg: Any) -> None:
+    """Display a user or AI message, including any thinking blocks."""
+    content = getattr(msg, "content", "")
+    if not content:
+        return
+
+    # Display thinking blocks if present
+    if isinstance(content, list):
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "thinking":
+                with st.expander("💭 Thinking", expanded=False):
+                    st.write(part.get("thinking", ""))
+
+    render_content(content)
+
+
+def _show_tool_message(msg: Any) -> None:
+    """Display a tool result in an expander."""
+    tool_name = getattr(msg, "name", None) or "Tool"
+    with st.expander(f"Tool: {tool_name}", expanded=False):
+        st.write(getattr(msg, "content", ""))
+
+
+def _show_nothing(msg: Any) -> None:
+    """Ignore messages of unknown type."""
+
+
+_MESSAGE_RENDERERS: dict[str, Callable[[Any], None]] = {
+    "user": _show_chat_message,
+    "human": _show_chat_message,
+    "ai": _show_chat_message,
+    **dict.fromkeys(TOOL_TYPES, _show_tool_message),
+}
+
+
 def show_message(msg: Any) -> None:
     """Display a single message based on its type."""
-    msg_type = getattr(msg, "type", "").lower()
-    content = getattr(msg, "content", "")
+    _MESSAGE_RENDERERS.get(getattr(msg, "type", "").lower(), _show_nothing)(msg)
 
-    if msg_type in {"user", "human", "ai"}:
-        if not content:
-            return
 
-        # Display thinking blocks if present
-        if isinstance(content, list):
-            for part in content:
-                if isinstance(part, dict) and part.get("type") == "thinking":
-                    with st.expander("💭 Thinking", expanded=False):
-                        st.write(part.get("thinking", ""))
+def _expand_history_window(thread_id: str, window: int) -> None:
+    """Show another HISTORY_WINDOW messages of the given thread."""
+    st.session_state.history_window = (thread_id, window + HISTORY_WINDOW)
 
-        render_content(content)
 
-    elif msg_type in TOOL_TYPES:
-        tool_name = getattr(msg, "name", None) or "Tool"
-        with st.expander(f"Tool: {tool_name}", expanded=False):
-            st.write(content)
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _load_messages(thread_id: str, rowid: int, _checkpoint: SqliteSaver) -> list[Any]:
+    """Load a thread's messages; cached per (thread_id, rowid) so unchanged threads skip deserialization."""
+    tup = _checkpoint.get_tuple({"configurable": {"thread_id": thread_id}})
+    if not tup:
+        return []
+    return getattr(tup, "checkpoint", {}).get("channel_values", {}).get("messages", [])
 
 
 def display_chat_history(checkpoint: SqliteSaver, thread_id: str) -> None:
     """Display the chat history for a given thread."""
-    tup = checkpoint.get_tuple({"configurable": {"thread_id": thread_id}})
-    if not tup:
+    rowid = get_thread_rowids(checkpoint).get(thread_id)
+    if rowid is None:
         return
 
-    messages = getattr(tup, "checkpoint", {}).get("channel_values", {}).get("messages", [])
+    messages = _load_messages(thread_id, rowid, checkpoint)
     if not messages:
         return
 
-    i = 0
+    # Only render the most recent messages; older ones are loaded on demand.
+    # The expanded window is tracked per thread so switching threads resets it.
+    window_thread, window = st.session_state.get("history_window", (None, HISTORY_WINDOW))
+    if window_thread != thread_id:
+        window = HISTORY_WINDOW
+
+    i = max(0, len(messages) - window)
+    if i > 0:
+        st.button(f"Load earlier ({i})", on_click=_expand_history_window, args=(thread_id, window))
+
     while i < len(messages):
         speaker = get_speaker(messages[i])
         with st.chat_message(speaker):
@@ -284,9 +405,29 @@ def display_chat_history(checkpoint: SqliteSaver, thread_id: str) -> None:
                 i += 1
 
 
+@st.cache_resource(show_spinner=False)
+def _open_checkpoint() -> SqliteSaver:
+    """Open the checkpoint database; one saver (and connection) is shared by all sessions."""
+    conn = sqlite3.connect("checkpoint.db", check_same_thread=False)
+    # WAL lets readers in other processes proceed alongside checkpoint writes (sessions
+    # here share this connection and serialize on SqliteSaver.lock). NORMAL sync skips
+    # the fsync per commit: the database stays consistent, but the last commits may be
+    # rolled back after a power loss or OS crash.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    # JsonPlusSerializer encodes checkpoints with ormsgpack (not pickle); pinned
+    # explicitly so history/title loads keep the fast path regardless of defaults
+    return SqliteSaver(conn, serde=JsonPlusSerializer(pickle_fallback=False))
+
+
 def initialize_checkpoint() -> None:
-    """Initialize checkpoint for conversation persistence."""
+    """Initialize checkpoint for conversation persistence.
+
+    The saver is shared across sessions, matching the agents built by the
+    cached builder in app.py, which are shared across sessions too.
+    """
     if "checkpoint" not in st.session_state:
-        st.session_state.checkpoint = SqliteSaver(
-            sqlite3.connect("checkpoint.db", check_same_thread=False)
-        )
+        st.session_state.checkpoint = _open_checkpoint()